@@ -8,51 +8,198 @@ Uso: python3 gantt_chart.py <csv_secuencial> <csv_paralelo> <output.png>
 
 import sys
 import os
-
-def parse_csv(filepath):
-    data = {'meta': {}, 'threads': [], 'pc_samples': {}}
+import csv
+import io
+import json
+import re
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: pip3 install numpy matplotlib")
+    sys.exit(1)
+
+# Estilos de los recuadros de texto, compartidos por todos los paneles
+BBOX_METRIC = dict(boxstyle='round,pad=0.4', facecolor='#1a1a2e',
+                   edgecolor='#F39C12', linewidth=2)
+BBOX_NOTE_RED = dict(boxstyle='round,pad=0.3', facecolor='#1c1c1c',
+                     edgecolor='#f85149', alpha=0.8)
+BBOX_NOTE_BLUE = dict(boxstyle='round,pad=0.3', facecolor='#1c1c1c',
+                      edgecolor='#58a6ff', alpha=0.8)
+BBOX_TCB_RED = dict(boxstyle='round,pad=0.4', facecolor='#1c2333',
+                    edgecolor='#E74C3C', linewidth=1.5)
+BBOX_TCB_GREEN = dict(boxstyle='round,pad=0.4', facecolor='#1c2333',
+                      edgecolor='#2ECC71', linewidth=1.5)
+BBOX_INFO_RED = dict(boxstyle='round,pad=0.4', facecolor='#1c2333',
+                     edgecolor='#E74C3C', linewidth=1)
+BBOX_INFO_GREEN = dict(boxstyle='round,pad=0.4', facecolor='#1c2333',
+                       edgecolor='#2ECC71', linewidth=1)
+
+HEX_RE = re.compile(r'(0[xX])?[0-9a-fA-F]+')
+
+
+def hex_value(s):
+    """int(s, 16) estricto: solo '0x' opcional + dígitos hex, y que quepa en uint64."""
+    if not HEX_RE.fullmatch(s):
+        raise ValueError(f'dirección hexadecimal inválida: {s!r}')
+    value = int(s, 16)
+    if value >> 64:
+        raise OverflowError(f'dirección fuera de rango uint64: {s!r}')
+    return value
+
+
+def parse_hex(strings):
+    """Convierte una lista de direcciones hexadecimales a un ndarray uint64."""
+    return np.fromiter((hex_value(s) for s in strings), dtype=np.uint64, count=len(strings))
+
+
+def find_cs(t, k):
+    """Índices j donde t[j] - t[j-1] supera k veces el intervalo medio de muestreo."""
+    if len(t) < 2 or t[-1] <= t[0]:
+        return np.empty(0, dtype=np.int64)
+    avg = (t[-1] - t[0]) / len(t)
+    return np.nonzero(np.diff(t) > k * avg)[0] + 1
+
+
+def read_section(text):
+    """Lee una sección CSV (cabecera + filas) como lista de dicts."""
+    reader = csv.DictReader(io.StringIO(text.strip()))
+    return [{k.strip(): v.strip() for k, v in row.items()} for row in reader]
+
+
+def index_samples(data, tids, columns):
+    """Agrupa las muestras por hilo en buffers contiguos y crea vistas por hilo.
+
+    columns: {'t': ndarray, 'pc': ndarray, 'px': ndarray} alineados con tids.
+    """
+    order = np.argsort(tids, kind='stable')
+    data['pc_columns'] = {k: v[order] for k, v in columns.items()}
+    uniq, starts, counts = np.unique(tids[order], return_index=True, return_counts=True)
+    for tid, start, end in zip(uniq.tolist(), starts.tolist(), (starts + counts).tolist()):
+        data['pc_index'][tid] = (start, end)
+        data['pc_samples'][tid] = {k: v[start:end] for k, v in data['pc_columns'].items()}
+
+
+def parse_csv_text(filepath):
+    # pc_columns: {'t', 'pc', 'px'} -> ndarray con todas las muestras, agrupadas por hilo
+    # pc_index:   {thread_id: (inicio, fin)} dentro de pc_columns
+    # pc_samples: {thread_id: {'t', 'pc', 'px'}} vistas (sin copia) de pc_columns
+    data = {'meta': {}, 'threads': [], 'pc_columns': {}, 'pc_index': {}, 'pc_samples': {}}
     with open(filepath, 'r') as f:
         content = f.read().strip()
     sections = content.split('\n\n')
 
-    lines = sections[0].strip().split('\n')
-    keys = lines[0].split(',')
-    vals = lines[1].split(',')
-    for k, v in zip(keys, vals):
-        data['meta'][k.strip()] = v.strip()
-
-    lines = sections[1].strip().split('\n')
-    header = lines[0].split(',')
-    for line in lines[1:]:
-        vals = line.split(',')
-        thread = {}
-        for k, v in zip(header, vals):
-            thread[k.strip()] = v.strip()
-        data['threads'].append(thread)
+    data['meta'] = read_section(sections[0])[0]
+    data['threads'] = read_section(sections[1])
 
     if len(sections) > 2:
-        lines = sections[2].strip().split('\n')
-        header = lines[0].split(',')
-        for line in lines[1:]:
-            vals = line.split(',')
-            sample = {}
-            for k, v in zip(header, vals):
-                sample[k.strip()] = v.strip()
-            tid = int(sample['thread_id'])
-            if tid not in data['pc_samples']:
-                data['pc_samples'][tid] = []
-            data['pc_samples'][tid].append(sample)
+        rows = read_section(sections[2])
+        n = len(rows)
+        tids = np.fromiter((int(r['thread_id']) for r in rows), dtype=np.int64, count=n)
+        # Columnas NumPy: t (ms), pc (dirección), px (píxeles procesados)
+        index_samples(data, tids, {
+            't': np.fromiter((float(r['timestamp_ms']) for r in rows),
+                             dtype=np.float64, count=n),
+            'pc': parse_hex([r['pc_addr'] for r in rows]),
+            'px': np.fromiter((int(r['pixels_at']) for r in rows),
+                              dtype=np.int64, count=n),
+        })
+    return data
+
+
+# Versión del formato de la caché .npz; incrementar si cambia parse_csv_text
+CACHE_VERSION = 1
+
+
+def save_cache(cache_path, data):
+    """Guarda el resultado de parse_csv_text en un .npz (meta/threads como JSON).
+
+    Se escribe en un temporal del mismo directorio y se renombra al final, de
+    modo que una escritura interrumpida nunca deja un .npz a medias.
+    """
+    index = data['pc_index']
+    tids = np.array(list(index), dtype=np.int64)
+    counts = np.array([end - start for start, end in index.values()], dtype=np.int64)
+    cols = data['pc_columns'] or {'t': np.empty(0, np.float64),
+                                  'pc': np.empty(0, np.uint64),
+                                  'px': np.empty(0, np.int64)}
+    info = json.dumps({'version': CACHE_VERSION,
+                       'meta': data['meta'], 'threads': data['threads'],
+                       'has_samples': bool(index)})
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path) or '.',
+                                    prefix=os.path.basename(cache_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, info=np.array(info), tid=np.repeat(tids, counts), **cols)
+        # mkstemp crea el archivo con 0600; dejarlo con los permisos de un open() normal
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_cache(cache_path):
+    """Reconstruye el dict de parse_csv_text desde un .npz de save_cache."""
+    with np.load(cache_path) as npz:
+        info = json.loads(str(npz['info']))
+        if info.get('version') != CACHE_VERSION:
+            raise ValueError(f'versión de caché {info.get("version")} != {CACHE_VERSION}')
+        data = {'meta': info['meta'], 'threads': info['threads'],
+                'pc_columns': {}, 'pc_index': {}, 'pc_samples': {}}
+        if info['has_samples']:
+            index_samples(data, npz['tid'], {k: npz[k] for k in ('t', 'pc', 'px')})
     return data
 
 
+def parse_csv(filepath):
+    """parse_csv_text con caché <csv>.npz, válida mientras el CSV no cambie."""
+    cache_path = filepath + '.npz'
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(filepath):
+            return load_cache(cache_path)
+    except Exception:
+        pass  # caché ausente, dañada o de otra versión: volver a parsear
+
+    data = parse_csv_text(filepath)
+    try:
+        save_cache(cache_path, data)
+    except OSError:
+        pass  # directorio de solo lectura: seguir sin caché
+    return data
+
+
+def hbar_verts(lefts, widths, ys, height):
+    """Vértices (n, 4, 2) de barras horizontales, para un PolyCollection."""
+    lefts = np.asarray(lefts, dtype=np.float64)
+    rights = lefts + np.asarray(widths, dtype=np.float64)
+    bottoms = np.asarray(ys, dtype=np.float64) - height / 2
+    tops = bottoms + height
+    return np.stack([np.column_stack([lefts, bottoms]),
+                     np.column_stack([lefts, tops]),
+                     np.column_stack([rights, tops]),
+                     np.column_stack([rights, bottoms])], axis=1)
+
+
 def generate_gantt(seq_csv, par_csv, output_path):
     try:
         import matplotlib
         matplotlib.use('Agg')
+        # Agg simplifica vértices que caen en el mismo píxel y trocea paths largos
+        matplotlib.rcParams.update({
+            'path.simplify': True,
+            'path.simplify_threshold': 1.0,
+            'agg.path.chunksize': 10000,
+        })
         import matplotlib.pyplot as plt
         import matplotlib.patches as mpatches
         import matplotlib.gridspec as gridspec
         from matplotlib.patches import FancyBboxPatch
+        from matplotlib.collections import LineCollection, PolyCollection
+        from matplotlib.lines import Line2D
     except ImportError:
         print("Error: pip3 install matplotlib")
         sys.exit(1)
@@ -74,23 +221,40 @@ def generate_gantt(seq_csv, par_csv, output_path):
         '#C0392B', '#27AE60', '#2980B9', '#D35400',
         '#8E44AD', '#16A085', '#F1C40F', '#7F8C8D'
     ]
+    # Color de cada hilo, indexado directamente por thread_id (hasta el mayor leído)
+    max_tid = max((int(t['thread_id']) for t in par['threads']), default=-1)
+    thread_colors = [TC[i % len(TC)] for i in range(max(nt, max_tid + 1))]
 
     # ═══════════════════════════════════════════════
     #  LAYOUT: 5 filas x 2 columnas
     # ═══════════════════════════════════════════════
-    fig = plt.figure(figsize=(22, 28))
-    fig.patch.set_facecolor('#0d1117')
-
-    gs = gridspec.GridSpec(5, 2, height_ratios=[2.2, 2.5, 2.5, 2.5, 1.5],
-                           hspace=0.32, wspace=0.22,
-                           left=0.06, right=0.97, top=0.955, bottom=0.025)
-
     T = '#e6edf3'   # text color
     G = '#21262d'    # grid
     BG = '#0d1117'   # background
     ABG = '#161b22'  # axes background
     ACC = '#F39C12'  # accent
 
+    # Estilo común de todos los ejes (los ejes lo heredan al crearse)
+    plt.rcParams.update({
+        'figure.facecolor': BG,
+        'axes.facecolor': ABG,
+        'axes.edgecolor': G,
+        'axes.labelcolor': T,
+        'axes.spines.top': False,
+        'axes.spines.right': False,
+        'xtick.color': T,
+        'ytick.color': T,
+        'grid.color': G,
+        'grid.alpha': 0.4,
+        'grid.linestyle': '--',
+    })
+
+    fig = plt.figure(figsize=(22, 28))
+
+    gs = gridspec.GridSpec(5, 2, height_ratios=[2.2, 2.5, 2.5, 2.5, 1.5],
+                           hspace=0.32, wspace=0.22,
+                           left=0.06, right=0.97, top=0.955, bottom=0.025)
+
     fig.text(0.5, 0.98,
              'DIAGRAMA DE GANTT — Planificación de Hilos y Gestión de Recursos del SO',
              ha='center', va='center', color=ACC, fontsize=18, fontweight='bold')
@@ -104,7 +268,6 @@ def generate_gantt(seq_csv, par_csv, output_path):
 
     # --- 1A: GANTT SECUENCIAL ---
     ax1a = fig.add_subplot(gs[0, 0])
-    ax1a.set_facecolor(ABG)
     ax1a.set_title('SECUENCIAL — 1 Hilo de Ejecución',
                     color='#E74C3C', fontsize=12, fontweight='bold', pad=10)
 
@@ -122,39 +285,41 @@ def generate_gantt(seq_csv, par_csv, output_path):
 
     ax1a.set_xlim(-wall_seq * 0.02, wall_seq * 1.4)
     ax1a.set_ylim(-0.8, 0.8)
-    ax1a.set_xlabel('Tiempo (ms)', color=T, fontsize=9)
+    ax1a.set_xlabel('Tiempo (ms)', fontsize=9)
     ax1a.set_yticks([0])
-    ax1a.set_yticklabels(['Hilo 0\n(main)'], color=T, fontsize=9)
-    ax1a.tick_params(colors=T)
-    ax1a.grid(axis='x', color=G, alpha=0.4, linestyle='--')
-    for s in ['top', 'right']:
-        ax1a.spines[s].set_visible(False)
-    for s in ['bottom', 'left']:
-        ax1a.spines[s].set_color(G)
+    ax1a.set_yticklabels(['Hilo 0\n(main)'], fontsize=9)
+    ax1a.grid(True, axis='x')
 
     # --- 1B: GANTT PARALELO ---
     ax1b = fig.add_subplot(gs[0, 1])
-    ax1b.set_facecolor(ABG)
     ax1b.set_title(f'PARALELO — {nt} Hilos de Ejecución',
                     color='#2ECC71', fontsize=12, fontweight='bold', pad=10)
 
+    # Barras de todos los hilos en dos colecciones (wall y CPU)
+    starts, durations, cpu_us, ys, colors, labels = [], [], [], [], [], []
     for t in par['threads']:
         tid = int(t['thread_id'])
         start = float(t['start_ms'])
         end = float(t['end_ms'])
         cpu_u = float(t['cpu_user_ms'])
-        duration = end - start
-        c = TC[tid % len(TC)]
-        y = nt - tid
-
-        # Wall time (transparente)
-        ax1b.barh(y, duration, left=start, height=0.65,
-                  color=c, alpha=0.15, edgecolor=c, linewidth=0.5)
-        # CPU time (sólido)
-        ax1b.barh(y, cpu_u, left=start, height=0.65,
-                  color=c, alpha=0.85, edgecolor='white', linewidth=0.5)
-        ax1b.text(start + duration / 2, y,
-                  f'H-{tid}  {cpu_u:.1f}ms',
+        starts.append(start)
+        durations.append(end - start)
+        cpu_us.append(cpu_u)
+        ys.append(nt - tid)
+        colors.append(thread_colors[tid])
+        labels.append((start + (end - start) / 2, nt - tid, f'H-{tid}  {cpu_u:.1f}ms'))
+
+    # Wall time (transparente)
+    ax1b.add_collection(PolyCollection(hbar_verts(starts, durations, ys, 0.65),
+                                       facecolors=colors, edgecolors=colors,
+                                       alpha=0.15, linewidths=0.5))
+    # CPU time (sólido)
+    ax1b.add_collection(PolyCollection(hbar_verts(starts, cpu_us, ys, 0.65),
+                                       facecolors=colors, edgecolors='white',
+                                       alpha=0.85, linewidths=0.5))
+    ax1b.autoscale_view()
+    for x, y, label in labels:
+        ax1b.text(x, y, label,
                   ha='center', va='center', color='white', fontsize=7, fontweight='bold')
 
     # Padre (join)
@@ -164,23 +329,17 @@ def generate_gantt(seq_csv, par_csv, output_path):
               ha='center', va='center', color=ACC, fontsize=7, fontweight='bold')
 
     ax1b.set_xlim(-wall_par * 0.02, wall_par * 1.1)
-    ax1b.set_xlabel('Tiempo (ms)', color=T, fontsize=9)
+    ax1b.set_xlabel('Tiempo (ms)', fontsize=9)
     yticks = list(range(0, nt + 1))
     ylabels = ['Padre'] + [f'Hilo {i}' for i in range(nt - 1, -1, -1)]
     ax1b.set_yticks(yticks)
-    ax1b.set_yticklabels(ylabels, color=T, fontsize=7)
-    ax1b.tick_params(colors=T)
-    ax1b.grid(axis='x', color=G, alpha=0.4, linestyle='--')
-    for s in ['top', 'right']:
-        ax1b.spines[s].set_visible(False)
-    for s in ['bottom', 'left']:
-        ax1b.spines[s].set_color(G)
+    ax1b.set_yticklabels(ylabels, fontsize=7)
+    ax1b.grid(True, axis='x')
 
     # Flecha de speedup entre paneles
     fig.text(0.5, 0.88, f'Speedup: {speedup:.2f}x',
              ha='center', va='center', color=ACC, fontsize=14, fontweight='bold',
-             bbox=dict(boxstyle='round,pad=0.4', facecolor='#1a1a2e',
-                       edgecolor=ACC, linewidth=2))
+             bbox=BBOX_METRIC)
 
     # Leyenda compartida
     legend_elements = [
@@ -197,40 +356,32 @@ def generate_gantt(seq_csv, par_csv, output_path):
 
     # --- 2A: CPU Secuencial ---
     ax2a = fig.add_subplot(gs[1, 0])
-    ax2a.set_facecolor(ABG)
     ax2a.set_title('SECUENCIAL — Asignación de CPU por el Scheduler',
                     color='#E74C3C', fontsize=11, fontweight='bold', pad=10)
 
     if 0 in seq['pc_samples']:
-        samples = seq['pc_samples'][0]
-        times = [float(s['timestamp_ms']) for s in samples]
+        times = seq['pc_samples'][0]['t']
         # Dibujar una barra continua en Core 0
         ax2a.barh(0, wall_seq, left=0, height=0.6,
                   color='#E74C3C', alpha=0.8, edgecolor='white', linewidth=0.5)
 
-        # Marcadores de muestreo del PC
-        for i, t_ms in enumerate(times):
-            if i % (len(times) // 20 + 1) == 0:
-                ax2a.plot(t_ms, 0, '|', color='white', markersize=8, alpha=0.6)
+        # Marcadores de muestreo del PC (~20, en un solo artista)
+        marks = times[::len(times) // 20 + 1]
+        ax2a.plot(marks, np.zeros_like(marks), '|', color='white', markersize=8, alpha=0.6)
 
     ax2a.set_xlim(-wall_seq * 0.02, wall_seq * 1.05)
     ax2a.set_ylim(-1, 1.5)
-    ax2a.set_xlabel('Tiempo (ms)', color=T, fontsize=9)
+    ax2a.set_xlabel('Tiempo (ms)', fontsize=9)
     ax2a.set_yticks([0])
-    ax2a.set_yticklabels(['Core 0'], color=T, fontsize=9)
-    ax2a.tick_params(colors=T)
-    ax2a.grid(axis='x', color=G, alpha=0.4, linestyle='--')
-    for s in ['top', 'right']:
-        ax2a.spines[s].set_visible(False)
-    for s in ['bottom', 'left']:
-        ax2a.spines[s].set_color(G)
+    ax2a.set_yticklabels(['Core 0'], fontsize=9)
+    ax2a.grid(True, axis='x')
 
     ax2a.text(wall_seq * 0.5, 0.9,
               f'Un solo hilo ocupa 1 core durante {wall_seq:.1f} ms\n'
               f'Los otros {nt - 1} cores permanecen OCIOSOS',
               ha='center', va='center', color='#f85149', fontsize=9,
               fontweight='bold', style='italic',
-              bbox=dict(boxstyle='round,pad=0.3', facecolor='#1c1c1c', edgecolor='#f85149', alpha=0.8))
+              bbox=BBOX_NOTE_RED)
 
     # Dibujar cores ociosos
     for core in range(1, min(nt, 4)):
@@ -239,55 +390,53 @@ def generate_gantt(seq_csv, par_csv, output_path):
 
     # --- 2B: CPU Paralelo ---
     ax2b = fig.add_subplot(gs[1, 1])
-    ax2b.set_facecolor(ABG)
     ax2b.set_title(f'PARALELO — Asignación de CPU por el Scheduler ({nt} cores)',
                     color='#2ECC71', fontsize=11, fontweight='bold', pad=10)
 
+    starts, durations, cores, colors = [], [], [], []
     for t in par['threads']:
         tid = int(t['thread_id'])
         start = float(t['start_ms'])
         end = float(t['end_ms'])
-        c = TC[tid % len(TC)]
         core = tid % nt
+        starts.append(start)
+        durations.append(end - start)
+        cores.append(core)
+        colors.append(thread_colors[tid])
 
-        # Barra del hilo en su core
-        ax2b.barh(core, end - start, left=start, height=0.65,
-                  color=c, alpha=0.8, edgecolor='white', linewidth=0.5)
         ax2b.text(start + (end - start) / 2, core,
                   f'H-{tid}', ha='center', va='center',
                   color='white', fontsize=7, fontweight='bold')
 
         # Marcar context switches si hay muestras
         if tid in par['pc_samples']:
-            samples = par['pc_samples'][tid]
-            times = [float(s['timestamp_ms']) for s in samples]
-            for j in range(1, len(times)):
-                gap = times[j] - times[j - 1]
-                avg = (times[-1] - times[0]) / len(times) if len(times) > 1 else gap
-                if gap > avg * 4 and avg > 0:
-                    mid = (times[j - 1] + times[j]) / 2
-                    ax2b.annotate('', xy=(times[j], core + 0.35), xytext=(times[j - 1], core + 0.35),
-                                  arrowprops=dict(arrowstyle='<->', color='#f85149', lw=1.5))
-                    ax2b.text(mid, core + 0.42, 'CS', ha='center', va='bottom',
-                              color='#f85149', fontsize=5.5, fontweight='bold')
+            times = par['pc_samples'][tid]['t']
+            # Huecos entre muestras > 4x el intervalo medio => hilo desalojado
+            for j in find_cs(times, 4.0):
+                mid = (times[j - 1] + times[j]) / 2
+                ax2b.annotate('', xy=(times[j], core + 0.35), xytext=(times[j - 1], core + 0.35),
+                              arrowprops=dict(arrowstyle='<->', color='#f85149', lw=1.5))
+                ax2b.text(mid, core + 0.42, 'CS', ha='center', va='bottom',
+                          color='#f85149', fontsize=5.5, fontweight='bold')
+
+    # Barra de cada hilo en su core, todas en una sola colección
+    ax2b.add_collection(PolyCollection(hbar_verts(starts, durations, cores, 0.65),
+                                       facecolors=colors, edgecolors='white',
+                                       alpha=0.8, linewidths=0.5))
+    ax2b.autoscale_view()
 
     ax2b.set_xlim(-wall_par * 0.02, wall_par * 1.05)
-    ax2b.set_xlabel('Tiempo (ms)', color=T, fontsize=9)
+    ax2b.set_xlabel('Tiempo (ms)', fontsize=9)
     ax2b.set_yticks(range(nt))
-    ax2b.set_yticklabels([f'Core {i}' for i in range(nt)], color=T, fontsize=7)
-    ax2b.tick_params(colors=T)
-    ax2b.grid(axis='x', color=G, alpha=0.4, linestyle='--')
-    for s in ['top', 'right']:
-        ax2b.spines[s].set_visible(False)
-    for s in ['bottom', 'left']:
-        ax2b.spines[s].set_color(G)
+    ax2b.set_yticklabels([f'Core {i}' for i in range(nt)], fontsize=7)
+    ax2b.grid(True, axis='x')
 
     ax2b.text(wall_par * 0.5, nt - 0.3,
               f'{nt} hilos distribuidos en {nt} cores por el planificador\n'
               f'CS = Context Switch (cambio de contexto detectado)',
               ha='center', va='center', color='#58a6ff', fontsize=8,
               fontweight='bold', style='italic',
-              bbox=dict(boxstyle='round,pad=0.3', facecolor='#1c1c1c', edgecolor='#58a6ff', alpha=0.8))
+              bbox=BBOX_NOTE_BLUE)
 
     # ═════════════════════════════════════════════════════════════
     #  FILA 3: EVOLUCIÓN DEL PCI (Program Counter)
@@ -295,18 +444,18 @@ def generate_gantt(seq_csv, par_csv, output_path):
 
     # --- 3A: PCI Secuencial ---
     ax3a = fig.add_subplot(gs[2, 0])
-    ax3a.set_facecolor(ABG)
     ax3a.set_title('SECUENCIAL — Evolución del PCI (Program Counter)\n'
                     'Contenido del TCB: Un solo flujo de ejecución lineal',
                     color='#E74C3C', fontsize=10, fontweight='bold', pad=8)
 
     if 0 in seq['pc_samples']:
         samples = seq['pc_samples'][0]
-        times = [float(s['timestamp_ms']) for s in samples]
-        pcs_raw = [int(s['pc_addr'], 16) for s in samples]
-        pc_base = min(pcs_raw)
+        times = samples['t']
+        pcs_raw = samples['pc']
+        pc_base = int(pcs_raw.min())
         # Mostrar como offset desde la base de rle_compress
-        pcs_offset = [(p - pc_base) for p in pcs_raw]
+        pcs_offset = pcs_raw - np.uint64(pc_base)
+        pc_span = int(pcs_offset.max())
 
         ax3a.plot(times, pcs_offset, '-', color='#E74C3C', linewidth=1.8, alpha=0.9)
         ax3a.fill_between(times, pcs_offset, alpha=0.1, color='#E74C3C')
@@ -315,77 +464,67 @@ def generate_gantt(seq_csv, par_csv, output_path):
         ax3a.plot(times[0], pcs_offset[0], 'o', color='#2ECC71', markersize=10, zorder=5)
         ax3a.plot(times[-1], pcs_offset[-1], 's', color='#E74C3C', markersize=10, zorder=5)
         ax3a.annotate('INICIO\nPC = rle_compress()', xy=(times[0], pcs_offset[0]),
-                       xytext=(times[0] + wall_seq * 0.15, pcs_offset[0] + max(pcs_offset) * 0.3),
+                       xytext=(times[0] + wall_seq * 0.15, pcs_offset[0] + pc_span * 0.3),
                        arrowprops=dict(arrowstyle='->', color='#2ECC71', lw=1.5),
                        color='#2ECC71', fontsize=8, fontweight='bold')
         ax3a.annotate('FIN\nreturn', xy=(times[-1], pcs_offset[-1]),
-                       xytext=(times[-1] - wall_seq * 0.15, pcs_offset[-1] - max(pcs_offset) * 0.2),
+                       xytext=(times[-1] - wall_seq * 0.15, pcs_offset[-1] - pc_span * 0.2),
                        arrowprops=dict(arrowstyle='->', color='#E74C3C', lw=1.5),
                        color='#E74C3C', fontsize=8, fontweight='bold')
 
         # TCB info box
-        ax3a.text(wall_seq * 0.7, max(pcs_offset) * 0.85,
+        ax3a.text(wall_seq * 0.7, pc_span * 0.85,
                   f'TCB del Hilo Principal:\n'
                   f'  TID:    {seq["threads"][0]["tid"]}\n'
                   f'  Estado: RUNNING\n'
-                  f'  PC:     0x{pc_base:X} → 0x{max(pcs_raw):X}\n'
+                  f'  PC:     0x{pc_base:X} → 0x{pc_base + pc_span:X}\n'
                   f'  Stack:  {seq["threads"][0]["stack_addr"]}',
                   color=T, fontsize=7.5, fontfamily='monospace',
-                  bbox=dict(boxstyle='round,pad=0.4', facecolor='#1c2333',
-                            edgecolor='#E74C3C', linewidth=1.5))
-
-    ax3a.set_xlabel('Tiempo (ms)', color=T, fontsize=9)
-    ax3a.set_ylabel('PCI — Offset desde base (bytes)', color=T, fontsize=9)
-    ax3a.tick_params(colors=T)
-    ax3a.grid(color=G, alpha=0.3, linestyle='--')
-    for s in ['top', 'right']:
-        ax3a.spines[s].set_visible(False)
-    for s in ['bottom', 'left']:
-        ax3a.spines[s].set_color(G)
+                  bbox=BBOX_TCB_RED)
+
+    ax3a.set_xlabel('Tiempo (ms)', fontsize=9)
+    ax3a.set_ylabel('PCI — Offset desde base (bytes)', fontsize=9)
+    ax3a.grid(True, alpha=0.3)
 
     # --- 3B: PCI Paralelo ---
     ax3b = fig.add_subplot(gs[2, 1])
-    ax3b.set_facecolor(ABG)
     ax3b.set_title(f'PARALELO — Evolución del PCI ({nt} hilos simultáneos)\n'
                     f'Cada hilo tiene su propio PC en el TCB',
                     color='#2ECC71', fontsize=10, fontweight='bold', pad=8)
 
-    all_pc_base = None
-    for tid_k in par['pc_samples']:
-        pcs = [int(s['pc_addr'], 16) for s in par['pc_samples'][tid_k]]
-        if pcs:
-            mn = min(pcs)
-            if all_pc_base is None or mn < all_pc_base:
-                all_pc_base = mn
-    if all_pc_base is None:
-        all_pc_base = 0
+    all_pc_base = int(par['pc_columns']['pc'].min()) if par['pc_samples'] else 0
 
+    # Todas las trazas en un solo LineCollection (1 artista en vez de nt); los
+    # segmentos son vistas por hilo de un único buffer (N, 2) con todas las muestras
+    if par['pc_samples']:
+        cols = par['pc_columns']
+        pci_xy = np.column_stack([cols['t'], cols['pc'] - np.uint64(all_pc_base)])
+    pci_segments, pci_colors, pci_handles = [], [], []
     for t in par['threads']:
         tid = int(t['thread_id'])
-        c = TC[tid % len(TC)]
+        c = thread_colors[tid]
 
         if tid in par['pc_samples']:
-            samples = par['pc_samples'][tid]
-            times = [float(s['timestamp_ms']) for s in samples]
-            pcs_raw = [int(s['pc_addr'], 16) for s in samples]
-            pcs_offset = [(p - all_pc_base) for p in pcs_raw]
-
-            ax3b.plot(times, pcs_offset, '-', color=c, linewidth=1.3,
-                      alpha=0.85, label=f'H-{tid} (TID {t["tid"]})')
-
-            # Marcar inicio
-            ax3b.plot(times[0], pcs_offset[0], 'o', color=c, markersize=5, zorder=5)
-            ax3b.plot(times[-1], pcs_offset[-1], 's', color=c, markersize=5, zorder=5)
-
-    ax3b.set_xlabel('Tiempo (ms)', color=T, fontsize=9)
-    ax3b.set_ylabel('PCI — Offset desde base (bytes)', color=T, fontsize=9)
-    ax3b.tick_params(colors=T)
-    ax3b.grid(color=G, alpha=0.3, linestyle='--')
-    for s in ['top', 'right']:
-        ax3b.spines[s].set_visible(False)
-    for s in ['bottom', 'left']:
-        ax3b.spines[s].set_color(G)
-    ax3b.legend(fontsize=6, facecolor=ABG, edgecolor=G,
+            start, end = par['pc_index'][tid]
+            pci_segments.append(pci_xy[start:end])
+            pci_colors.append(c)
+            pci_handles.append(Line2D([], [], color=c, linewidth=1.3, alpha=0.85,
+                                      label=f'H-{tid} (TID {t["tid"]})'))
+
+    if pci_segments:
+        ax3b.add_collection(LineCollection(pci_segments, colors=pci_colors,
+                                           linewidths=1.3, alpha=0.85))
+        # Marcar inicio y fin
+        starts_xy = np.array([seg[0] for seg in pci_segments])
+        ends_xy = np.array([seg[-1] for seg in pci_segments])
+        ax3b.scatter(starts_xy[:, 0], starts_xy[:, 1], c=pci_colors, marker='o', s=25, zorder=5)
+        ax3b.scatter(ends_xy[:, 0], ends_xy[:, 1], c=pci_colors, marker='s', s=25, zorder=5)
+        ax3b.autoscale_view()
+
+    ax3b.set_xlabel('Tiempo (ms)', fontsize=9)
+    ax3b.set_ylabel('PCI — Offset desde base (bytes)', fontsize=9)
+    ax3b.grid(True, alpha=0.3)
+    ax3b.legend(handles=pci_handles, fontsize=6, facecolor=ABG, edgecolor=G,
                 labelcolor=T, ncol=4, loc='upper left')
 
     # Annotation box for parallel
@@ -395,8 +534,7 @@ def generate_gantt(seq_csv, par_csv, output_path):
               f'TCB tiene su propio PC apuntando\n'
               f'a una posición diferente del código',
               color=T, fontsize=7.5, fontfamily='monospace',
-              bbox=dict(boxstyle='round,pad=0.4', facecolor='#1c2333',
-                        edgecolor='#2ECC71', linewidth=1.5))
+              bbox=BBOX_TCB_GREEN)
 
     # ═════════════════════════════════════════════════════════════
     #  FILA 4: PROGRESO Y THROUGHPUT
@@ -404,16 +542,16 @@ def generate_gantt(seq_csv, par_csv, output_path):
 
     # --- 4A: Progreso Secuencial ---
     ax4a = fig.add_subplot(gs[3, 0])
-    ax4a.set_facecolor(ABG)
     ax4a.set_title('SECUENCIAL — Progreso de Compresión',
                     color='#E74C3C', fontsize=11, fontweight='bold', pad=10)
 
     if 0 in seq['pc_samples']:
         samples = seq['pc_samples'][0]
-        times = [float(s['timestamp_ms']) for s in samples]
+        times = samples['t']
         total_px = int(seq['threads'][0]['pixels'])
-        pixels = [int(s['pixels_at']) for s in samples]
-        pct = [p / total_px * 100 if total_px > 0 else 0 for p in pixels]
+        pixels = samples['px']
+        pct = (pixels * (100.0 / total_px) if total_px > 0
+               else np.zeros_like(pixels, dtype=np.float64))
 
         ax4a.fill_between(times, pct, alpha=0.15, color='#E74C3C')
         ax4a.plot(times, pct, '-', color='#E74C3C', linewidth=2, label='Hilo 0 (único)')
@@ -422,15 +560,10 @@ def generate_gantt(seq_csv, par_csv, output_path):
         ax4a.axhline(y=100, color='#2ECC71', linewidth=1, linestyle='--', alpha=0.5)
         ax4a.text(wall_seq * 0.95, 102, '100%', color='#2ECC71', fontsize=8, ha='right')
 
-    ax4a.set_xlabel('Tiempo (ms)', color=T, fontsize=9)
-    ax4a.set_ylabel('Progreso (%)', color=T, fontsize=9)
+    ax4a.set_xlabel('Tiempo (ms)', fontsize=9)
+    ax4a.set_ylabel('Progreso (%)', fontsize=9)
     ax4a.set_ylim(-5, 115)
-    ax4a.tick_params(colors=T)
-    ax4a.grid(color=G, alpha=0.3, linestyle='--')
-    for s in ['top', 'right']:
-        ax4a.spines[s].set_visible(False)
-    for s in ['bottom', 'left']:
-        ax4a.spines[s].set_color(G)
+    ax4a.grid(True, alpha=0.3)
     ax4a.legend(fontsize=8, facecolor=ABG, edgecolor=G, labelcolor=T)
 
     # Throughput annotation
@@ -441,41 +574,45 @@ def generate_gantt(seq_csv, par_csv, output_path):
               f'1 hilo procesa {total_bytes / 1024 / 1024:.1f} MB\n'
               f'en {wall_seq:.1f} ms',
               ha='center', va='center', color=T, fontsize=9,
-              bbox=dict(boxstyle='round,pad=0.4', facecolor='#1c2333',
-                        edgecolor='#E74C3C', linewidth=1))
+              bbox=BBOX_INFO_RED)
 
     # --- 4B: Progreso Paralelo ---
     ax4b = fig.add_subplot(gs[3, 1])
-    ax4b.set_facecolor(ABG)
     ax4b.set_title(f'PARALELO — Progreso de Compresión ({nt} hilos)',
                     color='#2ECC71', fontsize=11, fontweight='bold', pad=10)
 
+    if par['pc_samples']:
+        cols = par['pc_columns']
+        prog_xy = np.column_stack([cols['t'], cols['px'].astype(np.float64)])
+    prog_segments, prog_colors, prog_handles = [], [], []
     for t in par['threads']:
         tid = int(t['thread_id'])
-        c = TC[tid % len(TC)]
+        c = thread_colors[tid]
         total_px = int(t['pixels'])
 
         if tid in par['pc_samples']:
-            samples = par['pc_samples'][tid]
-            times = [float(s['timestamp_ms']) for s in samples]
-            pixels = [int(s['pixels_at']) for s in samples]
-            pct = [p / total_px * 100 if total_px > 0 else 0 for p in pixels]
-            ax4b.plot(times, pct, '-', color=c, linewidth=1.5,
-                      alpha=0.85, label=f'H-{tid}')
+            start, end = par['pc_index'][tid]
+            seg = prog_xy[start:end]
+            # píxeles -> porcentaje, in situ sobre la vista del hilo
+            seg[:, 1] *= 100.0 / total_px if total_px > 0 else 0.0
+            prog_segments.append(seg)
+            prog_colors.append(c)
+            prog_handles.append(Line2D([], [], color=c, linewidth=1.5, alpha=0.85,
+                                       label=f'H-{tid}'))
+
+    if prog_segments:
+        ax4b.add_collection(LineCollection(prog_segments, colors=prog_colors,
+                                           linewidths=1.5, alpha=0.85))
+        ax4b.autoscale_view()
 
     ax4b.axhline(y=100, color='#2ECC71', linewidth=1, linestyle='--', alpha=0.5)
     ax4b.text(wall_par * 0.95, 102, '100%', color='#2ECC71', fontsize=8, ha='right')
 
-    ax4b.set_xlabel('Tiempo (ms)', color=T, fontsize=9)
-    ax4b.set_ylabel('Progreso (%)', color=T, fontsize=9)
+    ax4b.set_xlabel('Tiempo (ms)', fontsize=9)
+    ax4b.set_ylabel('Progreso (%)', fontsize=9)
     ax4b.set_ylim(-5, 115)
-    ax4b.tick_params(colors=T)
-    ax4b.grid(color=G, alpha=0.3, linestyle='--')
-    for s in ['top', 'right']:
-        ax4b.spines[s].set_visible(False)
-    for s in ['bottom', 'left']:
-        ax4b.spines[s].set_color(G)
-    ax4b.legend(fontsize=6, facecolor=ABG, edgecolor=G,
+    ax4b.grid(True, alpha=0.3)
+    ax4b.legend(handles=prog_handles, fontsize=6, facecolor=ABG, edgecolor=G,
                 labelcolor=T, ncol=4, loc='lower right')
 
     throughput_par = (total_bytes / 1024 / 1024) / (wall_par / 1000) if wall_par > 0 else 0
@@ -484,8 +621,7 @@ def generate_gantt(seq_csv, par_csv, output_path):
               f'{nt} hilos procesan {total_bytes / 1024 / 1024:.1f} MB\n'
               f'en {wall_par:.1f} ms  ({speedup:.1f}x más rápido)',
               ha='center', va='center', color=T, fontsize=9,
-              bbox=dict(boxstyle='round,pad=0.4', facecolor='#1c2333',
-                        edgecolor='#2ECC71', linewidth=1))
+              bbox=BBOX_INFO_GREEN)
 
     # ═════════════════════════════════════════════════════════════
     #  FILA 5: RESUMEN DE CONCEPTOS DE SO
@@ -524,19 +660,17 @@ def generate_gantt(seq_csv, par_csv, output_path):
          f'Hilos comparten TEXT/DATA, buffers privados'),
     ]
 
+    # Estilos compartidos por todos los textos del panel
+    label_kw = dict(ha='left', va='center', color=ACC, fontsize=8, fontweight='bold')
+    val_kw = dict(ha='left', va='center', fontsize=7.5, fontfamily='monospace')
     for i, (label, sec_val, par_val) in enumerate(concepts):
         y = 3.0 - i * 0.48
-        # Label
-        ax5.text(left_x, y, f'{label}:', ha='left', va='center',
-                 color=ACC, fontsize=8, fontweight='bold')
         # Secuencial
-        ax5.text(left_x + 0.05, y - 0.18, f'SEC: {sec_val}',
-                 ha='left', va='center', color='#f87171', fontsize=7.5, fontfamily='monospace')
+        ax5.text(left_x, y, f'{label}:', **label_kw)
+        ax5.text(left_x + 0.05, y - 0.18, f'SEC: {sec_val}', color='#f87171', **val_kw)
         # Paralelo
-        ax5.text(right_x, y, f'{label}:', ha='left', va='center',
-                 color=ACC, fontsize=8, fontweight='bold')
-        ax5.text(right_x + 0.05, y - 0.18, f'PAR: {par_val}',
-                 ha='left', va='center', color='#4ade80', fontsize=7.5, fontfamily='monospace')
+        ax5.text(right_x, y, f'{label}:', **label_kw)
+        ax5.text(right_x + 0.05, y - 0.18, f'PAR: {par_val}', color='#4ade80', **val_kw)
 
     # Metrics box
     ax5.text(5, 0.25,
@@ -545,12 +679,15 @@ def generate_gantt(seq_csv, par_csv, output_path):
              f'Eficiencia: {efficiency:.1f}%  |  '
              f'CPU total: {cpu_seq:.1f}ms vs {cpu_par:.1f}ms',
              ha='center', va='center', color='white', fontsize=9, fontweight='bold',
-             bbox=dict(boxstyle='round,pad=0.4', facecolor='#1a1a2e',
-                       edgecolor=ACC, linewidth=2))
+             bbox=BBOX_METRIC)
 
     # ═══════════════════════════════════════════════
+    # PNG con zlib nivel 1: archivo algo más grande, codificación mucho más rápida
+    save_kw = {}
+    if output_path.lower().endswith('.png'):
+        save_kw['pil_kwargs'] = {'compress_level': 1, 'optimize': False}
     plt.savefig(output_path, dpi=150, facecolor=fig.get_facecolor(),
-                edgecolor='none', bbox_inches='tight')
+                edgecolor='none', bbox_inches='tight', **save_kw)
     plt.close()
     print(f"\n  Diagrama de Gantt generado: {output_path}")
 